@@ -8,6 +8,10 @@ and generates a catalog index that can be consumed by the Cupcake CLI.
 Usage:
     python scripts/generate-index.py
 
+Releases are read from the GitHub REST API when GITHUB_TOKEN and
+GITHUB_REPOSITORY are set (as in GitHub Actions), and through the gh CLI
+otherwise.
+
 The script will:
 1. Scan rulebooks/ for directories with manifest.yaml
 2. Parse each manifest to extract metadata
@@ -15,79 +19,257 @@ The script will:
 4. Generate index.yaml with all entries sorted by version (newest first)
 """
 
+import functools
 import hashlib
+import http.client
 import json
+import mmap
+import os
+import re
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import yaml
 
+# Use the libyaml-backed C loader when available
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# Parsed manifests are cached as JSON under this directory of the repo being
+# indexed, keyed by a hash of the file contents
+MANIFEST_CACHE_SUBDIR = Path(".cache") / "manifests"
+
+# Manifest reads and (libyaml) parses release the GIL, so threads scale well
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+GITHUB_API_HOST = "api.github.com"
+
+# Pattern to extract the next page URL from a GitHub API Link header
+NEXT_LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+# Characters JSON leaves unescaped that YAML either rejects as non-printable
+# or folds as line breaks inside double-quoted scalars
+YAML_UNSAFE_PATTERN = re.compile("[\x7f-\x9f\u2028\u2029\ud800-\udfff\ufffe\uffff]")
 
-def get_release_tags() -> list[str]:
-    """Get all release tags using gh CLI."""
+
+def _decode_json_stream(data: bytes) -> list:
+    """Decode a stream of concatenated JSON documents.
+
+    'gh api --paginate' emits one JSON array per page back to back, which
+    json.loads cannot handle on its own. The common single-page case is
+    decoded straight from bytes.
+    """
     try:
-        result = subprocess.run(
-            [
-                "gh",
-                "release",
-                "list",
-                "--json",
-                "tagName",
-                "--limit",
-                "100",
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        releases = json.loads(result.stdout) if result.stdout else []
-        return [r["tagName"] for r in releases]
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        # gh CLI not available or not authenticated
-        return []
-
-
-def get_release_info(tag: str) -> dict | None:
-    """Get detailed release info for a specific tag using gh CLI.
-
-    Uses 'gh release view' which provides asset details including
-    download URLs and digests.
+        return [json.loads(data)]
+    except json.JSONDecodeError as e:
+        if e.msg != "Extra data":
+            raise
+
+    decoder = json.JSONDecoder()
+    values = []
+    text = data.decode().strip()
+    idx = 0
+    while idx < len(text):
+        value, idx = decoder.raw_decode(text, idx)
+        values.append(value)
+        while idx < len(text) and text[idx].isspace():
+            idx += 1
+    return values
+
+
+def _fetch_releases_api(repository: str, token: str) -> list[dict]:
+    """Fetch all releases from the GitHub REST API.
+
+    Every page is requested over the same keep-alive HTTPS connection, so
+    only one TLS handshake is paid regardless of the number of releases.
     """
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "cupcake-catalog-generate-index",
+    }
+    url = f"/repos/{repository}/releases?per_page=100"
+    releases = []
+
+    conn = http.client.HTTPSConnection(GITHUB_API_HOST, timeout=30)
     try:
-        result = subprocess.run(
-            [
-                "gh",
-                "release",
-                "view",
-                tag,
-                "--json",
-                "tagName,createdAt,assets",
+        while url:
+            conn.request("GET", url, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise http.client.HTTPException(
+                    f"GET {url} returned HTTP {response.status}"
+                )
+            releases.extend(json.loads(body))
+
+            match = NEXT_LINK_PATTERN.search(response.getheader("Link") or "")
+            if match:
+                next_url = urlsplit(match.group(1))
+                url = f"{next_url.path}?{next_url.query}"
+            else:
+                url = None
+    finally:
+        conn.close()
+
+    return releases
+
+
+def _fetch_releases_gh() -> list[dict]:
+    """Fetch all releases using 'gh api --paginate' on the releases endpoint."""
+    stdout = subprocess.run(
+        [
+            "gh",
+            "api",
+            "--paginate",
+            "repos/{owner}/{repo}/releases?per_page=100",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    ).stdout
+    pages = _decode_json_stream(stdout) if stdout.strip() else []
+    return [release for page in pages for release in page]
+
+
+def get_releases() -> dict[str, dict]:
+    """Get all releases with asset details.
+
+    The releases endpoint returns asset download URLs and digests alongside
+    each release, so no per-tag 'gh release view' is needed. Releases are
+    keyed by tag name and use the same shape as
+    'gh release view --json tagName,createdAt,assets'.
+    """
+    token = os.environ.get("GITHUB_TOKEN")
+    repository = os.environ.get("GITHUB_REPOSITORY")
+
+    if token and repository:
+        try:
+            raw_releases = _fetch_releases_api(repository, token)
+        except (OSError, http.client.HTTPException, json.JSONDecodeError) as e:
+            print(
+                f"WARNING: Failed to fetch releases from GitHub: {e}", file=sys.stderr
+            )
+            return {}
+    else:
+        try:
+            raw_releases = _fetch_releases_gh()
+        except (
+            subprocess.CalledProcessError,
+            FileNotFoundError,
+            json.JSONDecodeError,
+        ):
+            # gh CLI not available or not authenticated
+            return {}
+
+    releases = {}
+    for release in raw_releases:
+        releases[release["tag_name"]] = {
+            "tagName": release["tag_name"],
+            "createdAt": release.get("created_at"),
+            "assets": [
+                {
+                    "name": asset.get("name", ""),
+                    "url": asset.get("browser_download_url", ""),
+                    "digest": asset.get("digest"),
+                }
+                for asset in release.get("assets", [])
             ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return json.loads(result.stdout) if result.stdout else None
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError):
-        return None
+        }
+    return releases
 
 
 def calculate_digest(tarball_path: Path) -> str:
     """Calculate SHA-256 digest of a file."""
-    sha256 = hashlib.sha256()
     with open(tarball_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
+        if hasattr(hashlib, "file_digest"):
+            sha256 = hashlib.file_digest(f, "sha256")
+        else:
+            # Python < 3.11: hash the whole file in one native call via mmap
+            sha256 = hashlib.sha256()
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha256.update(mm)
     return f"sha256:{sha256.hexdigest()}"
 
 
-def parse_manifest(manifest_path: Path) -> dict | None:
-    """Parse a rulebook manifest.yaml file."""
+def load_manifest_cached(manifest_path: Path, cache_dir: Path | None = None):
+    """Load a manifest.yaml, reusing a cached parse if its contents are unchanged.
+
+    Repeat loads within a process are served from memory while the file's
+    mtime and size are unchanged. Otherwise, if cache_dir is given, the
+    on-disk cache there is consulted, keyed by a hash of the raw file bytes
+    rather than the path, so renames and branch switches never return a
+    stale parse. The on-disk cache is best-effort: manifests that don't
+    survive a JSON round trip unchanged (e.g. YAML dates) are simply parsed
+    every time.
+    """
+    st = manifest_path.stat()
+    return _load_manifest(str(manifest_path), st.st_mtime_ns, st.st_size, cache_dir)
+
+
+@functools.lru_cache(maxsize=1024)
+def _load_manifest(path: str, mtime_ns: int, size: int, cache_dir: Path | None):
+    """Load a manifest via the on-disk cache in cache_dir, if any.
+
+    mtime_ns and size only key the LRU.
+    """
+    data = Path(path).read_bytes()
+    if cache_dir is None:
+        return yaml.load(data, Loader=_YamlLoader)
+
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    cache_path = cache_dir / f"{digest}.json"
+
+    try:
+        return json.loads(cache_path.read_bytes())
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    manifest = yaml.load(data, Loader=_YamlLoader)
+
+    try:
+        encoded = json.dumps(manifest)
+        if json.loads(encoded) == manifest:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write atomically so concurrent runs never see a partial file
+            with tempfile.NamedTemporaryFile(
+                "w", dir=cache_dir, suffix=".tmp", delete=False
+            ) as f:
+                f.write(encoded)
+            os.replace(f.name, cache_path)
+    except (OSError, TypeError, ValueError):
+        pass
+
+    return manifest
+
+
+def version_key(version) -> tuple:
+    """Sort key for a semver string, following semver precedence rules.
+
+    Build metadata is ignored and pre-releases sort before the release
+    they precede, e.g. 1.0.0-beta < 1.0.0. Pre-release identifiers are
+    compared one by one: numeric ones as integers and below alphanumeric
+    ones, so 1.0.0-rc.2 < 1.0.0-rc.10 < 1.0.0-rc.a.
+    """
+    core, _, prerelease = str(version).split("+", 1)[0].partition("-")
+    identifiers = tuple(
+        (0, int(part), "") if part.isdecimal() else (1, 0, part)
+        for part in (prerelease.split(".") if prerelease else ())
+    )
+    return tuple(int(p) for p in core.split(".")), not prerelease, identifiers
+
+
+def parse_manifest(manifest_path: Path, cache_dir: Path | None = None) -> dict | None:
+    """Parse a rulebook manifest.yaml file, caching parses in cache_dir if given."""
     try:
-        with open(manifest_path) as f:
-            manifest = yaml.safe_load(f)
+        manifest = load_manifest_cached(manifest_path, cache_dir)
 
         # Validate required fields
         if manifest.get("apiVersion") != "cupcake.dev/v1":
@@ -111,14 +293,15 @@ def parse_manifest(manifest_path: Path) -> dict | None:
         return None
 
 
-def generate_index() -> dict:
-    """Generate the catalog index from all rulebooks."""
-    repo_root = Path(__file__).parent.parent
+def generate_index(repo_root: Path = REPO_ROOT) -> dict:
+    """Generate the catalog index from all rulebooks under repo_root."""
     rulebooks_dir = repo_root / "rulebooks"
+    # Single timestamp for the index and every entry without a release date
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-    # Get list of available release tags
-    release_tags = set(get_release_tags())
-    print(f"Found {len(release_tags)} release(s) on GitHub")
+    # Fetch all releases (with asset details) up front
+    releases = get_releases()
+    print(f"Found {len(releases)} release(s) on GitHub")
 
     entries: dict[str, list] = {}
 
@@ -127,11 +310,12 @@ def generate_index() -> dict:
         return {
             "apiVersion": "cupcake.dev/v1",
             "kind": "CatalogIndex",
-            "generated": datetime.now(timezone.utc).isoformat(),
+            "generated": now_iso,
             "entries": entries,
         }
 
     # Scan all rulebook directories
+    manifest_paths = []
     for rulebook_path in sorted(rulebooks_dir.iterdir()):
         if not rulebook_path.is_dir():
             continue
@@ -141,7 +325,17 @@ def generate_index() -> dict:
             print(f"WARNING: No manifest.yaml in {rulebook_path.name}", file=sys.stderr)
             continue
 
-        manifest = parse_manifest(manifest_path)
+        manifest_paths.append(manifest_path)
+
+    # Parse manifests concurrently; map() preserves the sorted input order.
+    # Parses are cached inside the tree being indexed, not this checkout.
+    parse = functools.partial(
+        parse_manifest, cache_dir=repo_root / MANIFEST_CACHE_SUBDIR
+    )
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        manifests = list(executor.map(parse, manifest_paths))
+
+    for manifest in manifests:
         if not manifest:
             continue
 
@@ -161,42 +355,31 @@ def generate_index() -> dict:
             "deprecated": spec.get("deprecated", False),
         }
 
-        # Add release info if available (using gh release view for full details)
-        if tag in release_tags:
-            release = get_release_info(tag)
-            if release:
-                entry["created"] = release.get(
-                    "createdAt", datetime.now(timezone.utc).isoformat()
-                )
+        # Add release info if available
+        release = releases.get(tag)
+        if release:
+            entry["created"] = release.get("createdAt") or now_iso
 
-                # Find tarball asset - gh release view provides full asset details
-                assets = release.get("assets", [])
-                tarball = next(
-                    (a for a in assets if a.get("name", "").endswith(".tar.gz")), None
-                )
-                if tarball:
-                    # Use the download URL from the asset
-                    entry["urls"] = [tarball.get("url", "")]
-                    # Use the digest from GitHub if available, otherwise generate placeholder
-                    if tarball.get("digest"):
-                        entry["digest"] = tarball["digest"]
-                    else:
-                        entry["digest"] = (
-                            f"sha256:{hashlib.sha256(tag.encode()).hexdigest()}"
-                        )
-                    print(f"  Found release assets for {tag}")
+            # Find tarball asset
+            assets = release.get("assets", [])
+            tarball = next(
+                (a for a in assets if a.get("name", "").endswith(".tar.gz")), None
+            )
+            if tarball:
+                # Use the download URL from the asset
+                entry["urls"] = [tarball.get("url", "")]
+                # Use the digest from GitHub if available, otherwise generate placeholder
+                if tarball.get("digest"):
+                    entry["digest"] = tarball["digest"]
                 else:
-                    print(
-                        f"  WARNING: No tarball asset found for {tag}", file=sys.stderr
+                    entry["digest"] = (
+                        f"sha256:{hashlib.sha256(tag.encode()).hexdigest()}"
                     )
+                print(f"  Found release assets for {tag}")
             else:
-                entry["created"] = datetime.now(timezone.utc).isoformat()
-                print(
-                    f"  WARNING: Could not fetch release info for {tag}",
-                    file=sys.stderr,
-                )
+                print(f"  WARNING: No tarball asset found for {tag}", file=sys.stderr)
         else:
-            entry["created"] = datetime.now(timezone.utc).isoformat()
+            entry["created"] = now_iso
             print(f"  INFO: No release found for {tag} (will be created on merge)")
 
         # Add to entries
@@ -206,34 +389,73 @@ def generate_index() -> dict:
 
     # Sort versions (newest first) for each rulebook
     for name in entries:
-        entries[name].sort(
-            key=lambda e: tuple(map(int, e["version"].split("."))), reverse=True
-        )
+        entries[name].sort(key=lambda e: version_key(e["version"]), reverse=True)
 
     return {
         "apiVersion": "cupcake.dev/v1",
         "kind": "CatalogIndex",
-        "generated": datetime.now(timezone.utc).isoformat(),
+        "generated": now_iso,
         "entries": entries,
     }
 
 
+def _yaml_scalar(value) -> str:
+    """Format a value as a YAML flow scalar.
+
+    JSON strings, numbers, booleans and null are all valid YAML, so
+    json.dumps handles quoting and escaping.
+    """
+    return YAML_UNSAFE_PATTERN.sub(
+        lambda m: f"\\u{ord(m.group()):04x}", json.dumps(value, ensure_ascii=False)
+    )
+
+
+def emit_index(f, index: dict) -> None:
+    """Write a CatalogIndex to f as YAML.
+
+    The index has a fixed shape, so it is written line by line rather than
+    through PyYAML's generic emitter. Output is deterministic for a given
+    index and loads back to the same data.
+    """
+    f.write(f"apiVersion: {_yaml_scalar(index['apiVersion'])}\n")
+    f.write(f"kind: {_yaml_scalar(index['kind'])}\n")
+    f.write(f"generated: {_yaml_scalar(index['generated'])}\n")
+
+    if not index["entries"]:
+        f.write("entries: {}\n")
+        return
+
+    f.write("entries:\n")
+    for name, versions in index["entries"].items():
+        f.write(f"  {_yaml_scalar(name)}:\n")
+        for entry in versions:
+            # The first key opens the sequence item, the rest align under it
+            indent = "  - "
+            for key, value in entry.items():
+                if isinstance(value, list) and value:
+                    f.write(f"{indent}{key}:\n")
+                    for item in value:
+                        f.write(f"    - {_yaml_scalar(item)}\n")
+                elif isinstance(value, list):
+                    f.write(f"{indent}{key}: []\n")
+                else:
+                    f.write(f"{indent}{key}: {_yaml_scalar(value)}\n")
+                indent = "    "
+
+
 def main():
     """Main entry point."""
-    repo_root = Path(__file__).parent.parent
-    index_path = repo_root / "index.yaml"
+    index_path = REPO_ROOT / "index.yaml"
 
     print("Generating catalog index...")
     index = generate_index()
 
     # Write index.yaml
-    with open(index_path, "w") as f:
+    with open(index_path, "w", encoding="utf-8") as f:
         f.write("# Cupcake Catalog Index\n")
         f.write("# This file is auto-generated by scripts/generate-index.py\n")
         f.write("# Do not edit manually\n\n")
-        yaml.dump(
-            index, f, default_flow_style=False, sort_keys=False, allow_unicode=True
-        )
+        emit_index(f, index)
 
     rulebook_count = len(index["entries"])
     version_count = sum(len(versions) for versions in index["entries"].values())
@@ -20,14 +20,27 @@ Exit codes:
     1 - Namespace violations found
 """
 
+import functools
+import os
 import re
 import sys
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import yaml
 
-# Pattern to extract package declaration
-PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)", re.MULTILINE)
+# Use the libyaml-backed C loader when available
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Pattern to extract package declaration. Matches on raw bytes, since Rego
+# package names are ASCII and decoding the whole file would be wasted work.
+PACKAGE_PATTERN = re.compile(rb"^[ \t]*package[ \t]+([\w.]+)", re.MULTILINE)
+
+# Bytes read from the start of a .rego file when looking for its package,
+# which Rego requires before any rules
+PACKAGE_SCAN_BYTES = 8192
 
 # Reserved namespace prefixes that catalog policies must NOT use
 RESERVED_PREFIXES = [
@@ -37,19 +50,90 @@ RESERVED_PREFIXES = [
     "cupcake.helpers",
 ]
 
+# Matches any reserved prefix as a whole namespace segment, in a single scan
+RESERVED_PATTERN = re.compile(
+    r"^(" + "|".join(map(re.escape, RESERVED_PREFIXES)) + r")(?:\.|$)"
+)
+
+# Policy files are validated independently, so read and scan them in parallel
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
 
-def get_rulebook_name(rulebook_path: Path) -> str | None:
-    """Get the rulebook name from manifest.yaml."""
+@functools.lru_cache(maxsize=1024)
+def _parse_yaml_cached(path: str, mtime_ns: int, size: int):
+    """Parse a YAML file; mtime_ns and size only key the cache."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+def load_manifest(rulebook_path: Path) -> dict:
+    """Load a rulebook's manifest.yaml.
+
+    Returns the full parsed manifest so callers can read any field from a
+    single parse, or an empty dict if it is missing, invalid or not a mapping.
+    """
     manifest_path = rulebook_path / "manifest.yaml"
-    if not manifest_path.exists():
-        return None
 
     try:
-        with open(manifest_path) as f:
-            manifest = yaml.safe_load(f)
-        return manifest.get("metadata", {}).get("name")
+        st = manifest_path.stat()
+        manifest = _parse_yaml_cached(str(manifest_path), st.st_mtime_ns, st.st_size)
     except (yaml.YAMLError, OSError):
-        return None
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+@functools.lru_cache(maxsize=None)
+def namespace_pattern(prefix: str) -> re.Pattern:
+    """Compile a pattern matching the namespace `prefix` or anything nested under it."""
+    return re.compile(re.escape(prefix) + r"(?:\.|$)")
+
+
+def iter_rego_files(directory: str) -> Iterator[str]:
+    """Yield the paths of all .rego files under `directory`, recursively.
+
+    Uses os.scandir, whose entries carry the file type from the directory
+    read itself, so no extra stat() is issued per entry. Symlinked
+    directories are not descended into, to avoid cycles. Directories that
+    don't exist or can't be read are skipped.
+    """
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".rego") and entry.is_file():
+                        # Follow symlinked files, as opa check does, so a
+                        # linked policy can't bypass the namespace check
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def read_package(rego_path: str) -> str | None:
+    """Return the package declared in a .rego file, or None if there is none.
+
+    Only the first PACKAGE_SCAN_BYTES are read unless the declaration isn't
+    found there, or may be cut off at the end of that range. Raises OSError
+    if the file cannot be read.
+    """
+    with open(rego_path, "rb") as f:
+        data = f.read(PACKAGE_SCAN_BYTES)
+        match = PACKAGE_PATTERN.search(data)
+        if len(data) == PACKAGE_SCAN_BYTES and (not match or match.end() == len(data)):
+            data += f.read()
+            match = PACKAGE_PATTERN.search(data)
+    return match.group(1).decode("ascii") if match else None
+
+
+def relative_path(path: str, rulebook_path: Path) -> str:
+    """Return a path joined onto rulebook_path relative to it.
+
+    Slices off the known prefix instead of re-parsing both paths the way
+    Path.relative_to() does.
+    """
+    return path[len(str(rulebook_path)) + 1 :]
 
 
 def normalize_name(name: str) -> str:
@@ -58,45 +142,42 @@ def normalize_name(name: str) -> str:
 
 
 def validate_policy_file(
-    policy_path: Path, expected_prefix: str, rulebook_path: Path
+    policy_path: str, expected_prefix: str, rulebook_path: Path
 ) -> list[str]:
     """Validate a single policy file's namespace. Returns list of errors."""
     errors = []
+    rel = relative_path(policy_path, rulebook_path)
 
     try:
-        content = policy_path.read_text()
+        package = read_package(policy_path)
     except OSError as e:
         return [f"Cannot read {policy_path}: {e}"]
 
-    # Find package declaration
-    match = PACKAGE_PATTERN.search(content)
-    if not match:
-        errors.append(
-            f"{policy_path.relative_to(rulebook_path)}: No package declaration found"
-        )
+    if package is None:
+        errors.append(f"{rel}: No package declaration found")
         return errors
 
-    package = match.group(1)
-
     # Check for reserved namespace violation
-    for reserved in RESERVED_PREFIXES:
-        if package.startswith(reserved):
-            errors.append(
-                f"{policy_path.relative_to(rulebook_path)}: "
-                f"Package '{package}' uses reserved namespace '{reserved}'. "
-                f"Use '{expected_prefix}.*' instead."
-            )
-            return errors
+    reserved = RESERVED_PATTERN.match(package)
+    if reserved:
+        errors.append(
+            f"{rel}: "
+            f"Package '{package}' uses reserved namespace '{reserved.group(1)}'. "
+            f"Use '{expected_prefix}.*' instead."
+        )
+        return errors
 
     # Check for correct catalog namespace
-    if not package.startswith(expected_prefix):
+    if not namespace_pattern(expected_prefix).match(package):
         # Allow system packages
         system_prefix = expected_prefix.replace(".policies", ".system")
-        if not package.startswith(system_prefix) and not package.startswith(
-            expected_prefix.rsplit(".", 1)[0] + ".system"
+        root_system_prefix = expected_prefix.rsplit(".", 1)[0] + ".system"
+        if not (
+            namespace_pattern(system_prefix).match(package)
+            or namespace_pattern(root_system_prefix).match(package)
         ):
             errors.append(
-                f"{policy_path.relative_to(rulebook_path)}: "
+                f"{rel}: "
                 f"Package '{package}' must start with '{expected_prefix}' or '{system_prefix}'"
             )
 
@@ -104,62 +185,50 @@ def validate_policy_file(
 
 
 def validate_helper_file(
-    helper_path: Path, expected_prefix: str, rulebook_path: Path
+    helper_path: str, expected_prefix: str, rulebook_path: Path
 ) -> list[str]:
     """Validate a helper file's namespace. Returns list of errors."""
     errors = []
+    rel = relative_path(helper_path, rulebook_path)
 
     try:
-        content = helper_path.read_text()
+        package = read_package(helper_path)
     except OSError as e:
         return [f"Cannot read {helper_path}: {e}"]
 
-    # Find package declaration
-    match = PACKAGE_PATTERN.search(content)
-    if not match:
-        errors.append(
-            f"{helper_path.relative_to(rulebook_path)}: No package declaration found"
-        )
+    if package is None:
+        errors.append(f"{rel}: No package declaration found")
         return errors
 
-    package = match.group(1)
-
     # Helper files must use helpers namespace
-    if not package.startswith(expected_prefix):
+    if not namespace_pattern(expected_prefix).match(package):
         errors.append(
-            f"{helper_path.relative_to(rulebook_path)}: "
-            f"Package '{package}' must start with '{expected_prefix}'"
+            f"{rel}: " f"Package '{package}' must start with '{expected_prefix}'"
         )
 
     return errors
 
 
 def validate_system_file(
-    system_path: Path, expected_package: str, rulebook_path: Path
+    system_path: str, expected_package: str, rulebook_path: Path
 ) -> list[str]:
     """Validate a system file's namespace. Returns list of errors."""
     errors = []
+    rel = relative_path(system_path, rulebook_path)
 
     try:
-        content = system_path.read_text()
+        package = read_package(system_path)
     except OSError as e:
         return [f"Cannot read {system_path}: {e}"]
 
-    # Find package declaration
-    match = PACKAGE_PATTERN.search(content)
-    if not match:
-        errors.append(
-            f"{system_path.relative_to(rulebook_path)}: No package declaration found"
-        )
+    if package is None:
+        errors.append(f"{rel}: No package declaration found")
         return errors
 
-    package = match.group(1)
-
     # System files must use exact system namespace
     if package != expected_package:
         errors.append(
-            f"{system_path.relative_to(rulebook_path)}: "
-            f"Package '{package}' must be exactly '{expected_package}'"
+            f"{rel}: " f"Package '{package}' must be exactly '{expected_package}'"
         )
 
     return errors
@@ -170,7 +239,8 @@ def validate_namespace(rulebook_path: Path) -> list[str]:
     errors = []
 
     # Get rulebook name
-    name = get_rulebook_name(rulebook_path)
+    metadata = load_manifest(rulebook_path).get("metadata")
+    name = metadata.get("name") if isinstance(metadata, dict) else None
     if not name:
         return ["Cannot determine rulebook name from manifest.yaml"]
 
@@ -180,41 +250,42 @@ def validate_namespace(rulebook_path: Path) -> list[str]:
     expected_system_package = f"cupcake.catalog.{normalized_name}.system"
 
     # Find all .rego files in policies/
-    policies_dir = rulebook_path / "policies"
-    if not policies_dir.exists():
+    rulebook_dir = str(rulebook_path)
+    policies_dir = os.path.join(rulebook_dir, "policies")
+    if not os.path.exists(policies_dir):
         return ["No policies/ directory found"]
 
-    policy_files = list(policies_dir.rglob("*.rego"))
+    policy_files = list(iter_rego_files(policies_dir))
     if not policy_files:
         return ["No .rego files found in policies/"]
 
-    # Validate each policy file
-    for policy_path in policy_files:
-        errors.extend(
-            validate_policy_file(policy_path, expected_policies_prefix, rulebook_path)
-        )
-
-    # Validate helper files (if helpers/ directory exists)
-    helpers_dir = rulebook_path / "helpers"
-    if helpers_dir.exists():
-        helper_files = list(helpers_dir.rglob("*.rego"))
-        for helper_path in helper_files:
-            errors.extend(
-                validate_helper_file(
-                    helper_path, expected_helpers_prefix, rulebook_path
-                )
-            )
-
-    # Validate system files (if system/ directory exists)
-    system_dir = rulebook_path / "system"
-    if system_dir.exists():
-        system_files = list(system_dir.rglob("*.rego"))
-        for system_path in system_files:
-            errors.extend(
-                validate_system_file(
-                    system_path, expected_system_package, rulebook_path
-                )
-            )
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Validate each policy file
+        for file_errors in executor.map(
+            validate_policy_file,
+            policy_files,
+            repeat(expected_policies_prefix),
+            repeat(rulebook_path),
+        ):
+            errors.extend(file_errors)
+
+        # Validate helper files (if helpers/ directory exists)
+        for file_errors in executor.map(
+            validate_helper_file,
+            iter_rego_files(os.path.join(rulebook_dir, "helpers")),
+            repeat(expected_helpers_prefix),
+            repeat(rulebook_path),
+        ):
+            errors.extend(file_errors)
+
+        # Validate system files (if system/ directory exists)
+        for file_errors in executor.map(
+            validate_system_file,
+            iter_rego_files(os.path.join(rulebook_dir, "system")),
+            repeat(expected_system_package),
+            repeat(rulebook_path),
+        ):
+            errors.extend(file_errors)
 
     return errors
 
@@ -10,22 +10,37 @@ This script validates:
 
 Usage:
     python scripts/validate-rulebook.py rulebooks/my-rulebook
+    python scripts/validate-rulebook.py --batch rulebooks
+
+With --batch, every rulebook directory under the given directory is
+validated in parallel worker processes.
 
 Exit codes:
     0 - Validation passed
     1 - Validation failed
 """
 
+import os
 import re
+import stat
 import sys
+from collections import Counter
 from pathlib import Path
 
 import yaml
 
+# Use the libyaml-backed C loader when available
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # JSON Schema-like validation (simplified)
-VALID_HARNESSES = {"claude", "cursor", "opencode", "factory"}
-NAME_PATTERN = re.compile(r"^[a-z][a-z0-9-]*$")
-VERSION_PATTERN = re.compile(r"^\d+\.\d+\.\d+")
+VALID_HARNESSES = frozenset(
+    sys.intern(h) for h in ("claude", "cursor", "opencode", "factory")
+)
+_VALID_SORTED = sorted(VALID_HARNESSES)
+NAME_PATTERN = re.compile(r"[a-z][a-z0-9-]*")
+
+# Manifests are a few hundred bytes; refuse to parse anything unreasonably large
+MAX_MANIFEST_BYTES = 256 * 1024
 
 
 class ValidationError(Exception):
@@ -34,9 +49,29 @@ class ValidationError(Exception):
     pass
 
 
-def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
-    """Validate manifest.yaml contents. Returns list of errors."""
+def is_semver(version: str) -> bool:
+    """Check for MAJOR.MINOR.PATCH, optionally followed by -prerelease or +build."""
+    parts = version.split(".", 2)
+    if len(parts) != 3:
+        return False
+    patch = parts[2].split("-", 1)[0].split("+", 1)[0]
+    return parts[0].isdecimal() and parts[1].isdecimal() and patch.isdecimal()
+
+
+def validate_manifest(
+    manifest: dict, rulebook_path: Path
+) -> tuple[list[str], list[str]]:
+    """
+    Validate manifest.yaml contents.
+
+    Returns:
+        Tuple of (errors, harnesses), where harnesses holds the declared
+        harness names that are strings, de-duplicated in declaration order.
+        It is empty if the manifest is not a Rulebook or has no usable
+        metadata.harnesses list.
+    """
     errors = []
+    metadata = manifest.get("metadata")
 
     # Check apiVersion
     if manifest.get("apiVersion") != "cupcake.dev/v1":
@@ -48,17 +83,21 @@ def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
     if manifest.get("kind") != "Rulebook":
         errors.append(f"kind must be 'Rulebook', got '{manifest.get('kind')}'")
 
+    # Neither matches: this isn't a Rulebook manifest, so the metadata
+    # and structure checks would only add noise
+    if len(errors) == 2:
+        return errors, []
+
     # Check metadata
-    metadata = manifest.get("metadata")
     if not isinstance(metadata, dict):
         errors.append("metadata is required and must be an object")
-        return errors  # Can't continue without metadata
+        return errors, []  # Can't continue without metadata
 
     # Check name
     name = metadata.get("name")
     if not name:
         errors.append("metadata.name is required")
-    elif not NAME_PATTERN.match(name):
+    elif not NAME_PATTERN.fullmatch(name):
         errors.append(
             f"metadata.name must be lowercase alphanumeric with hyphens, got '{name}'"
         )
@@ -71,7 +110,7 @@ def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
     version = metadata.get("version")
     if not version:
         errors.append("metadata.version is required")
-    elif not VERSION_PATTERN.match(str(version)):
+    elif not is_semver(str(version)):
         errors.append(f"metadata.version must be semver (e.g., 1.0.0), got '{version}'")
 
     # Check description
@@ -83,6 +122,7 @@ def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
 
     # Check harnesses
     harnesses = metadata.get("harnesses")
+    harness_names = []
     if not harnesses:
         errors.append("metadata.harnesses is required")
     elif not isinstance(harnesses, list):
@@ -90,11 +130,15 @@ def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
     elif len(harnesses) == 0:
         errors.append("metadata.harnesses must contain at least one harness")
     else:
-        for harness in harnesses:
-            if harness not in VALID_HARNESSES:
-                errors.append(
-                    f"Invalid harness '{harness}'. Valid: {sorted(VALID_HARNESSES)}"
-                )
+        declared = Counter(sys.intern(str(h)) for h in harnesses)
+        for harness in sorted(declared.keys() - VALID_HARNESSES):
+            errors.append(f"Invalid harness '{harness}'. Valid: {_VALID_SORTED}")
+        for harness in sorted(h for h, count in declared.items() if count > 1):
+            errors.append(f"Harness '{harness}' is listed more than once")
+        # Non-string entries were reported above and have no directory to check
+        harness_names = list(
+            dict.fromkeys(sys.intern(h) for h in harnesses if isinstance(h, str))
+        )
 
     # Check maintainers (optional but validate if present)
     maintainers = metadata.get("maintainers", [])
@@ -105,39 +149,77 @@ def validate_manifest(manifest: dict, rulebook_path: Path) -> list[str]:
             elif not m.get("name"):
                 errors.append(f"metadata.maintainers[{i}].name is required")
 
-    return errors
+    return errors, harness_names
+
+
+def scan_dir(path: str | os.PathLike) -> dict[str, os.DirEntry]:
+    """List a directory in one syscall batch, keyed by entry name.
+
+    Returns an empty dict if the directory doesn't exist or can't be read.
+    """
+    try:
+        with os.scandir(path) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
 
 
-def validate_structure(rulebook_path: Path, harnesses: list[str]) -> list[str]:
-    """Validate rulebook directory structure. Returns list of errors."""
+def has_rego_files(directory: str) -> bool:
+    """Check whether a directory directly contains a .rego file, stopping at the first."""
+    try:
+        with os.scandir(directory) as it:
+            return any(e.name.endswith(".rego") and e.is_file() for e in it)
+    except OSError:
+        return False
+
+
+def validate_structure(
+    rulebook_path: Path,
+    harnesses: list[str],
+    entries: dict[str, os.DirEntry] | None = None,
+) -> list[str]:
+    """Validate rulebook directory structure. Returns list of errors.
+
+    entries may be passed in if the rulebook directory was already scanned.
+    """
     errors = []
+    harnesses = list(dict.fromkeys(harnesses))  # Check each harness only once
+    if entries is None:
+        entries = scan_dir(rulebook_path)
 
     # Check README.md exists
-    readme_path = rulebook_path / "README.md"
-    if not readme_path.exists():
+    readme_entry = entries.get("README.md")
+    if readme_entry is None or not readme_entry.is_file():
         errors.append("README.md is required")
 
     # Check policies directory
-    policies_dir = rulebook_path / "policies"
-    if not policies_dir.exists():
+    policies_entry = entries.get("policies")
+    if policies_entry is None or not policies_entry.is_dir():
         errors.append("policies/ directory is required")
         return errors  # Can't continue without policies
 
     # Check system/evaluate.rego at root level (shared across all harnesses)
-    evaluate_path = rulebook_path / "system" / "evaluate.rego"
-    if not evaluate_path.exists():
+    evaluate_entry = scan_dir(os.path.join(rulebook_path, "system")).get(
+        "evaluate.rego"
+    )
+    if evaluate_entry is None or not evaluate_entry.is_file():
         errors.append("Missing system/evaluate.rego at rulebook root")
 
-    # Check each declared harness has a policy directory
+    # Check each declared harness has a policy directory. policies/ is
+    # listed once; only declared harness directories are scanned further.
+    harness_dirs = {
+        name: entry
+        for name, entry in scan_dir(policies_entry.path).items()
+        if entry.is_dir()
+    }
     for harness in harnesses:
-        harness_dir = policies_dir / harness
-        if not harness_dir.exists():
+        harness_entry = harness_dirs.get(harness)
+        if harness_entry is None:
             errors.append(f"Missing policies/{harness}/ directory for declared harness")
             continue
 
         # Check that harness directory has at least one .rego file
-        rego_files = list(harness_dir.glob("*.rego"))
-        if not rego_files:
+        if not has_rego_files(harness_entry.path):
             errors.append(f"No .rego policy files in policies/{harness}/")
 
     return errors
@@ -153,57 +235,75 @@ def validate_rulebook(rulebook_path: Path) -> tuple[list[str], list[str]]:
     errors = []
     warnings = []
 
+    # Scan the rulebook directory once for all top-level checks
+    entries = scan_dir(rulebook_path)
+
     # Check manifest exists
-    manifest_path = rulebook_path / "manifest.yaml"
-    if not manifest_path.exists():
+    manifest_path = os.path.join(rulebook_path, "manifest.yaml")
+    manifest_entry = entries.get("manifest.yaml")
+    if manifest_entry is None:
         return [f"manifest.yaml not found in {rulebook_path}"], []
 
+    # Refuse oversized manifests before reading or parsing them
+    try:
+        st = manifest_entry.stat()
+    except OSError as e:
+        return [f"Cannot read manifest.yaml: {e}"], []
+
+    # Devices and FIFOs (e.g. a symlink to /dev/zero) report no useful size
+    if not stat.S_ISREG(st.st_mode):
+        return ["manifest.yaml must be a regular file"], []
+
+    if st.st_size > MAX_MANIFEST_BYTES:
+        return [f"manifest.yaml exceeds {MAX_MANIFEST_BYTES} bytes"], []
+
+    # Read raw bytes: libyaml decodes UTF-8 itself, and a blank file can be
+    # rejected without starting the parser. The read is bounded in case the
+    # file grew after it was stat()ed.
+    try:
+        with open(manifest_path, "rb") as f:
+            data = f.read(MAX_MANIFEST_BYTES + 1)
+    except OSError as e:
+        return [f"Cannot read manifest.yaml: {e}"], []
+
+    if len(data) > MAX_MANIFEST_BYTES:
+        return [f"manifest.yaml exceeds {MAX_MANIFEST_BYTES} bytes"], []
+
+    if not data.strip():
+        return ["manifest.yaml is empty"], []
+
     # Parse manifest
     try:
-        with open(manifest_path) as f:
-            manifest = yaml.safe_load(f)
+        manifest = yaml.load(data, Loader=_YamlLoader)
     except yaml.YAMLError as e:
         return [f"Invalid YAML in manifest.yaml: {e}"], []
 
     if not manifest:
         return ["manifest.yaml is empty"], []
 
+    if not isinstance(manifest, dict):
+        return ["manifest.yaml must be a mapping"], []
+
     # Validate manifest
-    errors.extend(validate_manifest(manifest, rulebook_path))
+    manifest_errors, harnesses = validate_manifest(manifest, rulebook_path)
+    errors.extend(manifest_errors)
 
-    # Get harnesses for structure validation
-    harnesses = manifest.get("metadata", {}).get("harnesses", [])
-    if harnesses and isinstance(harnesses, list):
-        errors.extend(validate_structure(rulebook_path, harnesses))
+    # Validate structure for the declared harnesses (none if metadata is unusable)
+    if harnesses:
+        errors.extend(validate_structure(rulebook_path, harnesses, entries))
 
     # Check for optional files (warnings only)
-    if not (rulebook_path / "CHANGELOG.md").exists():
+    if "CHANGELOG.md" not in entries:
         warnings.append("CHANGELOG.md is recommended for tracking version history")
 
     return errors, warnings
 
 
-def main():
-    """Main entry point."""
-    if len(sys.argv) != 2:
-        print("Usage: validate-rulebook.py <rulebook-path>", file=sys.stderr)
-        sys.exit(1)
-
-    rulebook_path = Path(sys.argv[1])
-
-    if not rulebook_path.exists():
-        print(f"ERROR: Path does not exist: {rulebook_path}", file=sys.stderr)
-        sys.exit(1)
-
-    if not rulebook_path.is_dir():
-        print(f"ERROR: Path is not a directory: {rulebook_path}", file=sys.stderr)
-        sys.exit(1)
-
+def print_report(rulebook_path: Path, errors: list[str], warnings: list[str]) -> None:
+    """Print the validation results for one rulebook."""
     print(f"Validating rulebook: {rulebook_path.name}")
     print("-" * 40)
 
-    errors, warnings = validate_rulebook(rulebook_path)
-
     # Print warnings
     for warning in warnings:
         print(f"WARNING: {warning}")
@@ -216,11 +316,76 @@ def main():
 
     if errors:
         print(f"FAILED: {len(errors)} error(s), {len(warnings)} warning(s)")
-        sys.exit(1)
     else:
         print(f"PASSED: 0 errors, {len(warnings)} warning(s)")
+
+
+def check_directory(path: Path) -> None:
+    """Exit with an error unless path is an existing directory."""
+    if not path.exists():
+        print(f"ERROR: Path does not exist: {path}", file=sys.stderr)
+        sys.exit(1)
+
+    if not path.is_dir():
+        print(f"ERROR: Path is not a directory: {path}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main_batch(rulebooks_dir: Path) -> None:
+    """Validate every rulebook under rulebooks_dir using a process pool."""
+    check_directory(rulebooks_dir)
+
+    # Imported here so single-rulebook runs don't pay for multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    rulebook_paths = sorted(p for p in rulebooks_dir.iterdir() if p.is_dir())
+
+    # Each rulebook is independent; worker processes also amortize the
+    # interpreter and PyYAML import cost across the whole batch
+    failed = 0
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(validate_rulebook, p) for p in rulebook_paths]
+
+        # Report in order as results arrive; a crash while validating one
+        # rulebook becomes that rulebook's error rather than ending the batch
+        for rulebook_path, future in zip(rulebook_paths, futures):
+            try:
+                errors, warnings = future.result()
+            except Exception as e:
+                errors, warnings = [f"Validation crashed: {e!r}"], []
+            print_report(rulebook_path, errors, warnings)
+            print()
+            if errors:
+                failed += 1
+
+    if failed:
+        print(f"FAILED: {failed} of {len(rulebook_paths)} rulebook(s) failed")
+        sys.exit(1)
+    else:
+        print(f"PASSED: {len(rulebook_paths)} rulebook(s)")
         sys.exit(0)
 
 
+def main():
+    """Main entry point."""
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        main_batch(Path(sys.argv[2]))
+
+    if len(sys.argv) != 2:
+        print(
+            "Usage: validate-rulebook.py <rulebook-path>\n"
+            "       validate-rulebook.py --batch <rulebooks-dir>",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    rulebook_path = Path(sys.argv[1])
+    check_directory(rulebook_path)
+
+    errors, warnings = validate_rulebook(rulebook_path)
+    print_report(rulebook_path, errors, warnings)
+    sys.exit(1 if errors else 0)
+
+
 if __name__ == "__main__":
     main()